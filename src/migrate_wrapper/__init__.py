@@ -1,7 +1,8 @@
 """migrate-wrapper: Python wrapper for golang-migrate/migrate CLI tool"""
 
-from .wrapper import MigrateWrapper
+from .wrapper import MigrateWrapper, validate_one
 from .config import MigrateConfig
+from .pool import MigratePool
 from .models import (
     Migration,
     MigrationResult,
@@ -15,7 +16,9 @@ __version__ = "0.1.0"
 
 __all__ = [
     "MigrateWrapper",
+    "validate_one",
     "MigrateConfig",
+    "MigratePool",
     "Migration",
     "MigrationResult",
     "DatabaseInfo",
@@ -1,12 +1,48 @@
 """Command execution for migrate CLI"""
 
+import asyncio
+import functools
+import os
 import subprocess
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import shutil
 
 from .config import MigrateConfig
 from .exceptions import MigrateNotFoundError
 
+# Known migrate error fragments (lower case) and their messages, in priority order
+_ERROR_MAP = (
+    ("dirty database", "Database is in dirty state"),
+    ("no migration", "No migrations found"),
+    ("already at the latest", "Already at latest version"),
+    ("file does not exist", "Migration file not found"),
+    ("connection refused", "Database connection failed"),
+)
+
+
+def _decode(output: Optional[bytes]) -> str:
+    """Decode migrate output, which is UTF-8 regardless of locale"""
+    return output.decode("utf-8", "replace") if output else ""
+
+
+@functools.lru_cache(maxsize=32)
+def _resolve_migrate(
+    command_path: str, search_path: Optional[str], cwd: Optional[str]
+) -> str:
+    """Resolve migrate command to an absolute path
+
+    ``cwd`` is part of the cache key for relative path-like commands, which
+    resolve against the working directory. Failures raise, and lru_cache
+    does not cache exceptions, so a later install is picked up.
+    """
+    resolved = shutil.which(command_path, path=search_path)
+    if not resolved:
+        raise MigrateNotFoundError(
+            f"migrate command not found at: {command_path}. "
+            "Please install golang-migrate/migrate first."
+        )
+    return os.path.abspath(resolved)
+
 
 class MigrateCommand:
     """Base class for migrate CLI command execution"""
@@ -17,16 +53,16 @@ class MigrateCommand:
 
     def _check_migrate_command(self) -> None:
         """Check if migrate command is available"""
-        if not shutil.which(self.config.command_path):
-            raise MigrateNotFoundError(
-                f"migrate command not found at: {self.config.command_path}. "
-                "Please install golang-migrate/migrate first."
-            )
+        command_path = self.config.command_path
+        relative = os.path.dirname(command_path) and not os.path.isabs(command_path)
+        self._resolved_path = _resolve_migrate(
+            command_path, os.environ.get("PATH"), os.getcwd() if relative else None
+        )
 
     def _build_base_args(self) -> List[str]:
         """Build base command arguments"""
         return [
-            self.config.command_path,
+            self._resolved_path,
             "-database",
             self.config.database_url,
             "-path",
@@ -35,18 +71,36 @@ class MigrateCommand:
 
     def execute(self, args: List[str]) -> subprocess.CompletedProcess:
         """Execute migrate command"""
-        return subprocess.run(args, capture_output=True, text=True, check=False)
-
-    def parse_error(self, stderr: str) -> Optional[str]:
-        """Parse error message from stderr"""
-        if "dirty database" in stderr.lower():
-            return "Database is in dirty state"
-        if "no migration" in stderr.lower():
-            return "No migrations found"
-        if "already at the latest" in stderr.lower():
-            return "Already at latest version"
-        if "file does not exist" in stderr.lower():
-            return "Migration file not found"
-        if "connection refused" in stderr.lower():
-            return "Database connection failed"
-        return stderr.strip() if stderr else None
+        result = subprocess.run(args, capture_output=True, check=False)
+        return subprocess.CompletedProcess(
+            args,
+            result.returncode,
+            stdout=_decode(result.stdout),
+            stderr=_decode(result.stderr),
+        )
+
+    async def execute_async(self, args: List[str]) -> subprocess.CompletedProcess:
+        """Execute migrate command as an asyncio subprocess"""
+        process = await asyncio.create_subprocess_exec(
+            *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        # communicate() waits for the process, so it has exited
+        assert process.returncode is not None
+        return subprocess.CompletedProcess(
+            args,
+            process.returncode,
+            stdout=_decode(stdout),
+            stderr=_decode(stderr),
+        )
+
+    def parse_error(self, stderr: str) -> Tuple[Optional[str], bool]:
+        """Parse error message and dirty flag from stderr"""
+        if not stderr:
+            return None, False
+        lower = stderr.lower()
+        dirty = "dirty" in lower
+        for needle, message in _ERROR_MAP:
+            if needle in lower:
+                return message, dirty
+        return stderr.strip(), dirty
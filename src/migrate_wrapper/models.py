@@ -1,11 +1,11 @@
 """Data models for migrate-wrapper"""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional, List
 
 
-@dataclass
+@dataclass(slots=True)
 class Migration:
     """Represents a single migration"""
 
@@ -14,6 +14,9 @@ class Migration:
     up_file: Path
     down_file: Optional[Path] = None
     timestamp: Optional[int] = None
+    # File existence as observed by the scanner; None means check the disk
+    _up_exists: Optional[bool] = field(default=None, repr=False, compare=False)
+    _down_exists: Optional[bool] = field(default=None, repr=False, compare=False)
 
     @property
     def filename_prefix(self) -> str:
@@ -24,14 +27,25 @@ class Migration:
 
     def has_up_file(self) -> bool:
         """Check if up migration file exists"""
-        return self.up_file.exists()
+        if self._up_exists is None:
+            return self.up_file.exists()
+        return self._up_exists
 
     def has_down_file(self) -> bool:
         """Check if down migration file exists"""
-        return self.down_file is not None and self.down_file.exists()
+        if self.down_file is None:
+            return False
+        if self._down_exists is None:
+            return self.down_file.exists()
+        return self._down_exists
 
+    def recheck_disk(self) -> None:
+        """Refresh file existence from the filesystem"""
+        self._up_exists = self.up_file.exists()
+        self._down_exists = self.down_file is not None and self.down_file.exists()
 
-@dataclass
+
+@dataclass(slots=True)
 class MigrationResult:
     """Result of a migration operation"""
 
@@ -42,7 +56,7 @@ class MigrationResult:
     dirty: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class DatabaseInfo:
     """Current database migration information"""
 
@@ -54,7 +68,7 @@ class DatabaseInfo:
         return not self.dirty
 
 
-@dataclass
+@dataclass(slots=True)
 class MissingDownFile:
     """Information about a migration missing its down file"""
 
@@ -62,7 +76,7 @@ class MissingDownFile:
     name: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationResult:
     """Result of migration validation"""
 
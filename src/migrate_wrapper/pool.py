@@ -0,0 +1,50 @@
+"""Sharing of recent migrate status results between wrappers"""
+
+import dataclasses
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .models import DatabaseInfo
+
+
+class MigratePool:
+    """Reuses recent database status across wrappers for the same database
+
+    migrate has no long-running mode to keep a process alive between
+    commands, so the pool keeps the last DatabaseInfo per database URL for
+    ``ttl`` seconds. Back-to-back status()/version() calls within that window
+    are answered without launching migrate. Any migrating command drops the
+    entry for its database.
+    """
+
+    def __init__(self, ttl: float = 0.1):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, DatabaseInfo]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, database_url: str) -> Optional[DatabaseInfo]:
+        """Get cached status if it is still fresh"""
+        with self._lock:
+            entry = self._entries.get(database_url)
+            if entry is None:
+                return None
+            stored_at, info = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[database_url]
+                return None
+            # Callers get their own copy, as DatabaseInfo is mutable
+            return dataclasses.replace(info)
+
+    def put(self, database_url: str, info: DatabaseInfo) -> None:
+        """Store status for a database"""
+        with self._lock:
+            self._entries[database_url] = (time.monotonic(), dataclasses.replace(info))
+
+    def invalidate(self, database_url: Optional[str] = None) -> None:
+        """Drop cached status for a database, or for all databases"""
+        with self._lock:
+            if database_url is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(database_url, None)
@@ -1,66 +1,146 @@
 """Migration file scanner"""
 
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
+import os
 import re
+import time
 
 from .models import Migration
 
+# Pattern to match migration files: <version>_<name>.<direction>.sql
+_MIGRATION_RE = re.compile(rb"^(\d+)_(.+)\.(up|down)\.sql$")
+_MIGRATION_SUFFIXES = (b".up.sql", b".down.sql")
+
+# Largest distance between consecutive versions still treated as a gap
+MAX_GAP_SIZE = 10_000
+
+# Directories modified within this window of a scan are not cached
+_RACY_WINDOW_NS = 2_000_000_000
+
 
 class MigrationScanner:
     """Scans directory for migration files"""
 
     def __init__(self, migrations_path: Path):
         self.migrations_path = migrations_path
+        self._scan_cache: Optional[Tuple[Tuple[int, int], List[Migration]]] = None
+
+    def scan(self, force: bool = False) -> List[Migration]:
+        """Scan for all migration files
+
+        Results are reused while the directory mtime is unchanged; pass
+        ``force=True`` to always read the directory.
+        """
+        try:
+            stat = os.stat(self.migrations_path)
+        except FileNotFoundError:
+            # Not created yet or removed; results for an earlier directory at
+            # this path must not be reused if it is recreated
+            self._scan_cache = None
+            return []
 
-    def scan(self) -> List[Migration]:
-        """Scan for all migration files"""
-        migrations = {}
-
-        # Pattern to match migration files: <version>_<name>.<direction>.sql
-        pattern = re.compile(r"^(\d+)_(.+)\.(up|down)\.sql$")
-
-        for file in self.migrations_path.glob("*.sql"):
-            match = pattern.match(file.name)
-            if not match:
-                continue
-
-            version = int(match.group(1))
-            name = match.group(2)
-            direction = match.group(3)
-
-            if version not in migrations:
-                migrations[version] = {
-                    "version": version,
-                    "name": name,
-                    "up_file": None,
-                    "down_file": None,
-                }
-
-            if direction == "up":
-                migrations[version]["up_file"] = file
-            elif direction == "down":
-                migrations[version]["down_file"] = file
-
-        return sorted(
-            [
-                Migration(**data)
-                for data in migrations.values()
-                if data["up_file"] is not None
-            ],
-            key=lambda m: m.version,
-        )
-
-    def find_gaps(self, migrations: List[Migration]) -> List[int]:
-        """Find gaps in migration sequence"""
+        # The inode tells a recreated directory apart from the cached one
+        mtime = stat.st_mtime_ns
+        key = (stat.st_ino, mtime)
+        if not force and self._scan_cache and self._scan_cache[0] == key:
+            return list(self._scan_cache[1])
+
+        started = time.time_ns()
+        migrations = self._scan_directory()
+
+        # A directory modified just before the scan may change again without
+        # a visible mtime change on coarse-grained filesystems; don't cache it
+        if started - mtime > _RACY_WINDOW_NS:
+            self._scan_cache = (key, migrations)
+        else:
+            self._scan_cache = None
+
+        return list(migrations)
+
+    def _scan_directory(self) -> List[Migration]:
+        """Read migration files from the directory"""
+        # version -> [name, up_file, down_file]
+        migrations: Dict[int, List[Any]] = {}
+
+        # Entries are listed as bytes so names are only decoded once matched
+        try:
+            listing = os.scandir(os.fsencode(self.migrations_path))
+        except FileNotFoundError:
+            # Removed since it was checked; there are no migrations to list
+            return []
+
+        with listing as entries:
+            for entry in entries:
+                name = entry.name
+                # Cheap checks reject other .sql files before the regex runs
+                if (
+                    not name[:1].isdigit()
+                    or not name.endswith(_MIGRATION_SUFFIXES)
+                    or not entry.is_file()
+                ):
+                    continue
+                match = _MIGRATION_RE.match(name)
+                if not match:
+                    continue
+
+                version = int(match.group(1))
+                row = migrations.get(version)
+                if row is None:
+                    row = migrations[version] = [
+                        os.fsdecode(match.group(2)),
+                        None,
+                        None,
+                    ]
+
+                row[1 if match.group(3) == b"up" else 2] = Path(os.fsdecode(entry.path))
+
+        return [
+            Migration(
+                version=version,
+                name=name,
+                up_file=up_file,
+                down_file=down_file,
+                _up_exists=True,
+                _down_exists=down_file is not None,
+            )
+            for version, (name, up_file, down_file) in sorted(migrations.items())
+            if up_file is not None
+        ]
+
+    def find_gaps(
+        self, migrations: List[Migration], max_gap: int = MAX_GAP_SIZE
+    ) -> List[int]:
+        """Find gaps in migration sequence
+
+        Gaps wider than ``max_gap`` indicate timestamp-based versions, for
+        which gap reporting is meaningless, so an empty list is returned.
+        """
         if not migrations:
             return []
 
-        versions = sorted([m.version for m in migrations])
-        gaps = []
+        versions = sorted(m.version for m in migrations)
+        gaps: List[int] = []
 
-        for i in range(versions[0], versions[-1]):
-            if i not in versions:
-                gaps.append(i)
+        for prev, curr in zip(versions, versions[1:]):
+            if curr - prev > max_gap:
+                return []
+            if curr - prev > 1:
+                gaps.extend(range(prev + 1, curr))
 
         return gaps
+
+    def has_gaps(
+        self, migrations: List[Migration], max_gap: int = MAX_GAP_SIZE
+    ) -> bool:
+        """Check for gaps in migration sequence without listing them"""
+        versions = sorted(m.version for m in migrations)
+        found = False
+
+        for prev, curr in zip(versions, versions[1:]):
+            if curr - prev > max_gap:
+                return False
+            if curr - prev > 1:
+                found = True
+
+        return found
@@ -1,10 +1,15 @@
 """Main MigrateWrapper implementation"""
 
+import multiprocessing
 import re
-from typing import Optional, List
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, List, Tuple, Union
 
 from .config import MigrateConfig
 from .command import MigrateCommand
+from .pool import MigratePool
 from .scanner import MigrationScanner
 from .models import (
     Migration,
@@ -15,15 +20,91 @@ from .models import (
 )
 from .exceptions import MigrateError, MigrateDirtyError
 
+# Progress lines printed by migrate, e.g. "2/u add_email (12.3ms)"
+_APPLIED_RE = re.compile(r"^(\d+)/(u|d) ", re.MULTILINE)
+# File name of a migration reported by migrate create
+_CREATED_FILE_RE = re.compile(r"^(\d+)_(.+)\.(up|down)\.\w+$")
+
 
 class MigrateWrapper:
     """Main wrapper class for migrate tool"""
 
-    def __init__(self, config: MigrateConfig):
+    def __init__(self, config: MigrateConfig, pool: Optional[MigratePool] = None):
         self.config = config
+        self.pool = pool
         self.config.validate()
         self.command = MigrateCommand(config)
         self.scanner = MigrationScanner(config.migrations_path)
+        self._cached_version: Optional[int] = None
+        self._version_known = False
+
+    def _remember_version(self, version: Optional[int]) -> Optional[int]:
+        """Record the version the database is known to be at"""
+        self._cached_version = version
+        self._version_known = True
+        return version
+
+    def _invalidate_pool(self) -> None:
+        """Drop shared status after a command that changes the database"""
+        if self.pool is not None:
+            self.pool.invalidate(self.config.database_url)
+
+    def _forget_version(self) -> None:
+        """Discard the known version after a failed operation"""
+        self._cached_version = None
+        self._version_known = False
+
+    def _resulting_version(
+        self,
+        result: subprocess.CompletedProcess,
+        direction: str,
+        steps: Optional[int],
+    ) -> Optional[int]:
+        """Get the version after a successful up/down
+
+        The version is read from migrate's progress output or derived from
+        the migration files and the last known version; migrate is only
+        queried when neither is possible.
+        """
+        known, version = self._predicted_version(result, direction, steps)
+        return version if known else self.version()
+
+    def _predicted_version(
+        self,
+        result: subprocess.CompletedProcess,
+        direction: str,
+        steps: Optional[int],
+    ) -> Tuple[bool, Optional[int]]:
+        """Get the version after a successful up/down without querying migrate
+
+        Returns whether the version could be determined, and the version.
+        """
+        output = f"{result.stdout or ''}\n{result.stderr or ''}"
+        applied = [int(v) for v, d in _APPLIED_RE.findall(output) if d == direction]
+        if applied and direction == "u":
+            return True, self._remember_version(applied[-1])
+
+        versions = [m.version for m in self.scanner.scan()]
+
+        if applied:
+            # After rolling back, the database is at the preceding migration
+            previous = [v for v in versions if v < applied[-1]]
+            return True, self._remember_version(previous[-1] if previous else None)
+
+        if steps is None:
+            # up applies every migration and down -all rolls back everything
+            latest = versions[-1] if direction == "u" and versions else None
+            return True, self._remember_version(latest)
+
+        known = self._cached_version
+        if self._version_known and (known is None or known in versions):
+            position = versions.index(known) if known is not None else -1
+            position += steps if direction == "u" else -steps
+            position = min(position, len(versions) - 1)
+            version = versions[position] if position >= 0 else None
+            return True, self._remember_version(version)
+
+        return False, None
 
     def create(
         self, name: str, sequential: bool = True, extension: str = "sql"
@@ -42,50 +123,76 @@ class MigrateWrapper:
         if result.returncode != 0:
             raise MigrateError(f"Failed to create migration: {result.stderr}")
 
-        # Parse created files from output and rescan
-        migrations_before = set(m.version for m in self.scanner.scan())
-        migrations_after = self.scanner.scan()
+        # migrate reports the created file paths, so the migration can be
+        # built without listing the directory
+        created = _created_migration(f"{result.stdout or ''}\n{result.stderr or ''}")
+        if created is not None:
+            return created
 
-        # Find the newly created migration
-        for migration in migrations_after:
-            if migration.version not in migrations_before:
-                return migration
+        migrations = self.scanner.scan(force=True)
 
         # If sequential, return the latest migration
-        if migrations_after:
-            return migrations_after[-1]
+        if migrations:
+            return migrations[-1]
 
         raise MigrateError("Could not find created migration")
 
     def up(self, steps: Optional[int] = None) -> MigrationResult:
         """Apply migrations forward"""
+        result = self.command.execute(self._up_args(steps))
+        migration, query_version = self._up_result(result, steps)
+        if query_version:
+            migration.version = self.version()
+        return migration
+
+    async def up_async(self, steps: Optional[int] = None) -> MigrationResult:
+        """Apply migrations forward without blocking the event loop"""
+        result = await self.command.execute_async(self._up_args(steps))
+        migration, query_version = self._up_result(result, steps)
+        if query_version:
+            migration.version = await self.version_async()
+        return migration
+
+    def _up_args(self, steps: Optional[int]) -> List[str]:
+        """Build arguments for the up command"""
         args = self.command._build_base_args()
         args.append("up")
 
         if steps is not None:
             args.append(str(steps))
 
-        result = self.command.execute(args)
+        return args
 
+    def _up_result(
+        self, result: subprocess.CompletedProcess, steps: Optional[int]
+    ) -> Tuple[MigrationResult, bool]:
+        """Build the result of an up command
+
+        Also returns whether the version is unknown and must be queried, which
+        the caller does with the sync or async version command.
+        """
+        self._invalidate_pool()
         if result.returncode == 0:
-            return MigrationResult(
+            known, version = self._predicted_version(result, "u", steps)
+            migration = MigrationResult(
                 success=True,
-                version=self.version(),
+                version=version,
                 message="Migrations applied successfully",
             )
-        else:
-            error_msg = self.command.parse_error(result.stderr)
-            is_dirty = "dirty" in result.stderr.lower()
+            return migration, not known
 
-            if is_dirty:
-                raise MigrateDirtyError(error_msg or "Database is in dirty state")
+        self._forget_version()
+        error_msg, is_dirty = self.command.parse_error(result.stderr)
 
-            return MigrationResult(
-                success=False,
-                version=self.version(),
-                message=error_msg or "Migration failed",
-                dirty=is_dirty,
-            )
+        if is_dirty:
+            raise MigrateDirtyError(error_msg or "Database is in dirty state")
+
+        migration = MigrationResult(
+            success=False,
+            version=None,
+            message=error_msg or "Migration failed",
+        )
+        return migration, True
 
     def down(self, steps: Optional[int] = None) -> MigrationResult:
         """Rollback migrations"""
@@ -99,16 +206,17 @@ class MigrateWrapper:
             args.append("-all")
 
         result = self.command.execute(args)
+        self._invalidate_pool()
 
         if result.returncode == 0:
             return MigrationResult(
                 success=True,
-                version=self.version(),
+                version=self._resulting_version(result, "d", steps),
                 message="Migrations rolled back successfully",
             )
         else:
-            error_msg = self.command.parse_error(result.stderr)
-            is_dirty = "dirty" in result.stderr.lower()
+            self._forget_version()
+            error_msg, is_dirty = self.command.parse_error(result.stderr)
 
             if is_dirty:
                 raise MigrateDirtyError(error_msg or "Database is in dirty state")
@@ -126,16 +234,17 @@ class MigrateWrapper:
         args.extend(["goto", str(version)])
 
         result = self.command.execute(args)
+        self._invalidate_pool()
 
         if result.returncode == 0:
             return MigrationResult(
                 success=True,
-                version=version if version > 0 else None,
+                version=self._remember_version(version if version > 0 else None),
                 message=f"Migrated to version {version}",
             )
         else:
-            error_msg = self.command.parse_error(result.stderr)
-            is_dirty = "dirty" in result.stderr.lower()
+            self._forget_version()
+            error_msg, is_dirty = self.command.parse_error(result.stderr)
 
             if is_dirty:
                 raise MigrateDirtyError(error_msg or "Database is in dirty state")
@@ -153,19 +262,22 @@ class MigrateWrapper:
         args.extend(["force", str(version)])
 
         result = self.command.execute(args)
+        self._invalidate_pool()
 
         if result.returncode == 0:
             return MigrationResult(
                 success=True,
-                version=version if version > 0 else None,
+                version=self._remember_version(version if version > 0 else None),
                 message=f"Forced version to {version}",
                 dirty=False,
             )
         else:
+            self._forget_version()
+            error_msg, _ = self.command.parse_error(result.stderr)
             return MigrationResult(
                 success=False,
                 version=self.version(),
-                message=(self.command.parse_error(result.stderr) or "Force failed"),
+                message=error_msg or "Force failed",
             )
 
     def drop(self, force: bool = False) -> MigrationResult:
@@ -177,53 +289,83 @@ class MigrateWrapper:
             args.append("-f")
 
         result = self.command.execute(args)
+        self._invalidate_pool()
 
         if result.returncode == 0:
             return MigrationResult(
                 success=True,
-                version=None,
+                version=self._remember_version(None),
                 message="Database dropped successfully",
             )
         else:
+            self._forget_version()
+            error_msg, _ = self.command.parse_error(result.stderr)
             return MigrationResult(
                 success=False,
                 version=self.version(),
-                message=(self.command.parse_error(result.stderr) or "Drop failed"),
+                message=error_msg or "Drop failed",
             )
 
     def version(self) -> Optional[int]:
         """Get current version"""
+        if self.pool is not None:
+            cached = self.pool.get(self.config.database_url)
+            if cached is not None:
+                return self._remember_version(cached.version)
+
         args = self.command._build_base_args()
         args.append("version")
 
         result = self.command.execute(args)
 
         if result.returncode == 0:
-            # Check stdout first, then stderr if stdout is empty
-            # golang-migrate version command outputs to stderr
-            output = (result.stdout or "").strip()
-            if not output and result.stderr:
-                output = result.stderr.strip()
-            if output:
-                # Parse version from output
-                # Expected formats:
-                # - "1" (just version number)
-                # - "version: 1"
-                # - "1 (dirty)"
-                # - "version: 1 (dirty)"
-                match = re.search(r"\b(\d+)\b", output)
-                if match:
-                    return int(match.group(1))
+            return self._remember_version(self._status_result(result).version)
+
+        return None
+
+    async def version_async(self) -> Optional[int]:
+        """Get current version without blocking the event loop"""
+        if self.pool is not None:
+            cached = self.pool.get(self.config.database_url)
+            if cached is not None:
+                return self._remember_version(cached.version)
+
+        args = self.command._build_base_args()
+        args.append("version")
+
+        result = await self.command.execute_async(args)
+
+        if result.returncode == 0:
+            return self._remember_version(self._status_result(result).version)
 
         return None
 
     def status(self) -> DatabaseInfo:
         """Get current database migration status"""
+        if self.pool is not None:
+            cached = self.pool.get(self.config.database_url)
+            if cached is not None:
+                return cached
+
         args = self.command._build_base_args()
         args.append("version")
 
-        result = self.command.execute(args)
+        return self._status_result(self.command.execute(args))
+
+    async def status_async(self) -> DatabaseInfo:
+        """Get current database migration status without blocking"""
+        if self.pool is not None:
+            cached = self.pool.get(self.config.database_url)
+            if cached is not None:
+                return cached
 
+        args = self.command._build_base_args()
+        args.append("version")
+
+        return self._status_result(await self.command.execute_async(args))
+
+    def _status_result(self, result: subprocess.CompletedProcess) -> DatabaseInfo:
+        """Build database status from version command output"""
         version = None
         dirty = False
 
@@ -234,15 +376,21 @@ class MigrateWrapper:
             if not output and result.stderr:
                 output = result.stderr.strip()
             if output:
-                # Extract version
-                match = re.search(r"\b(\d+)\b", output)
-                if match:
-                    version = int(match.group(1))
+                # Parse version from output
+                # Expected formats:
+                # - "1" (just version number)
+                # - "version: 1"
+                # - "1 (dirty)"
+                # - "version: 1 (dirty)"
+                version = _parse_version(output)
 
-                # Check if dirty
-                dirty = "dirty" in output.lower()
+                # Check if dirty (migrate reports it in lower case)
+                dirty = "dirty" in output
 
-        return DatabaseInfo(version=version, dirty=dirty)
+        info = DatabaseInfo(version=version, dirty=dirty)
+        if self.pool is not None and result.returncode == 0:
+            self.pool.put(self.config.database_url, info)
+        return info
 
     def list_migrations(self) -> List[Migration]:
         """List all available migrations"""
@@ -250,17 +398,93 @@ class MigrateWrapper:
 
     def validate_migrations(self) -> ValidationResult:
         """Validate migration files and sequence"""
+        return _validate(self.scanner, self.list_migrations())
+
+    def is_valid(self) -> bool:
+        """Check migrations are valid without building a full report"""
         migrations = self.list_migrations()
-        gaps = self.scanner.find_gaps(migrations)
-        missing_down = [m for m in migrations if not m.has_down_file()]
-
-        missing_down_files = [
-            MissingDownFile(version=m.version, name=m.name) for m in missing_down
-        ]
-
-        return ValidationResult(
-            valid=len(gaps) == 0 and len(missing_down) == 0,
-            total_migrations=len(migrations),
-            gaps=gaps,
-            missing_down_files=missing_down_files,
+        if not all(m.has_down_file() for m in migrations):
+            return False
+        return not self.scanner.has_gaps(migrations)
+
+    @staticmethod
+    def validate_many(
+        paths: Iterable[Union[str, Path]], max_workers: Optional[int] = None
+    ) -> List[ValidationResult]:
+        """Validate several migration directories in parallel processes"""
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in methods else "spawn"
         )
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            return list(pool.map(validate_one, [str(p) for p in paths]))
+
+
+def _parse_version(output: str) -> Optional[int]:
+    """Parse the first run of digits in version command output"""
+    i, n = 0, len(output)
+    while i < n and not "0" <= output[i] <= "9":
+        i += 1
+    j = i
+    while j < n and "0" <= output[j] <= "9":
+        j += 1
+    return int(output[i:j]) if j > i else None
+
+
+def _created_migration(output: str) -> Optional[Migration]:
+    """Build the migration from file paths printed by migrate create"""
+    files: Dict[str, Path] = {}
+    version: Optional[int] = None
+    name: Optional[str] = None
+
+    # migrate prints one absolute path per line, which may contain spaces
+    for line in output.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        path = Path(line)
+        match = _CREATED_FILE_RE.match(path.name)
+        if not match:
+            continue
+        if version is None:
+            version, name = int(match.group(1)), match.group(2)
+        elif int(match.group(1)) != version:
+            continue
+        files[match.group(3)] = path
+
+    if version is None or name is None or "up" not in files:
+        return None
+
+    return Migration(
+        version=version,
+        name=name,
+        up_file=files["up"],
+        down_file=files.get("down"),
+        _up_exists=True,
+        _down_exists="down" in files,
+    )
+
+
+def validate_one(path: Union[str, Path]) -> ValidationResult:
+    """Validate migration files in a single directory"""
+    scanner = MigrationScanner(Path(path))
+    return _validate(scanner, scanner.scan())
+
+
+def _validate(
+    scanner: MigrationScanner, migrations: List[Migration]
+) -> ValidationResult:
+    """Build validation result for scanned migrations"""
+    gaps = scanner.find_gaps(migrations)
+    missing_down = [m for m in migrations if not m.has_down_file()]
+
+    missing_down_files = [
+        MissingDownFile(version=m.version, name=m.name) for m in missing_down
+    ]
+
+    return ValidationResult(
+        valid=len(gaps) == 0 and len(missing_down) == 0,
+        total_migrations=len(migrations),
+        gaps=gaps,
+        missing_down_files=missing_down_files,
+    )
@@ -2,8 +2,14 @@
 Pytest configuration for migrate-wrapper tests
 """
 
+import os
+from pathlib import Path
+
 import pytest
 
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_BIN_PATH = _PROJECT_ROOT / "bin"
+
 
 def pytest_configure(config):
     """Register custom markers"""
@@ -11,6 +17,10 @@ def pytest_configure(config):
         "markers",
         "requires_pglite: marks test as requiring PGlite for PostgreSQL testing",
     )
+    config.addinivalue_line(
+        "markers",
+        "nodb: configures the wrapper without setting up the test database",
+    )
 
 
 def pytest_collection_modifyitems(config, items):
@@ -19,3 +29,17 @@ def pytest_collection_modifyitems(config, items):
         # Add requires_pglite marker to all PostgreSQL tests
         if "test_migrate_wrapper_postgres" in str(item.fspath):
             item.add_marker(pytest.mark.requires_pglite)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def bin_on_path():
+    """Add bin directory to PATH once so migrate is found"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("PATH", f"{_BIN_PATH}{os.pathsep}{os.environ['PATH']}")
+        yield
+
+
+@pytest.fixture(scope="session")
+def migration_templates(tmp_path_factory):
+    """Directory of migration file templates shared by the session"""
+    return tmp_path_factory.mktemp("migration_templates")
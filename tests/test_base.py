@@ -2,642 +2,951 @@
 Common test base classes for MigrateWrapper tests
 """
 
-import unittest
-import tempfile
-import shutil
+import asyncio
+import functools
+import hashlib
 import os
 from pathlib import Path
-from unittest.mock import patch, MagicMock
-from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import Iterator, Tuple
+from unittest.mock import patch, MagicMock, AsyncMock
 
+import pytest
+
+from migrate_wrapper import command as migrate_command
+from migrate_wrapper.command import MigrateCommand
+from migrate_wrapper.exceptions import MigrateNotFoundError
 from migrate_wrapper import (
     MigrateWrapper,
     MigrateConfig,
+    MigratePool,
     Migration,
     MigrateError,
     MigrateDirtyError,
+    validate_one,
 )
 
+# Database URL for tests that never reach a database
+NODB_URL = "sqlite://:memory:"
+
+# Successful migrate run with no output
+_OK = SimpleNamespace(returncode=0, stdout=b"", stderr=b"")
+
+
+@functools.lru_cache(maxsize=128)
+def _template_name(sql: str) -> str:
+    """Template file name for migration content"""
+    return hashlib.blake2b(sql.encode(), digest_size=8).hexdigest()
+
+
+def _write_file(path: Path, sql: str) -> None:
+    """Write migration content to a new or truncated file"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        # Most tests use empty files, which only need creating
+        if sql:
+            os.write(fd, sql.encode())
+    finally:
+        os.close(fd)
+
+
+def _results(*outputs: Tuple[int, bytes, bytes]) -> Iterator[SimpleNamespace]:
+    """Lazily build mocked migrate results from (returncode, stdout, stderr)"""
+    return (
+        SimpleNamespace(returncode=rc, stdout=stdout, stderr=stderr)
+        for rc, stdout, stderr in outputs
+    )
+
+
+def _migration_file_names(version: int, name: str) -> Tuple[str, str]:
+    """Up and down file names for a test migration"""
+    return f"{version:06d}_{name}.up.sql", f"{version:06d}_{name}.down.sql"
+
+
+class MigrateWrapperTestBase:
+    """Base test class for MigrateWrapper with database-specific setup
+
+    Database-specific subclasses provide the ``db_url`` fixture, set up
+    once per class and shared by its tests, and the ``set_db_version``
+    fixture.
+    """
+
+    @pytest.fixture
+    def migrations_dir(self, tmp_path):
+        """Migrations directory, removed by pytest's tmp_path cleanup"""
+        migrations_dir = tmp_path / "migrations"
+        migrations_dir.mkdir()
+        return migrations_dir
+
+    @pytest.fixture
+    def config(self, request, migrations_dir):
+        """Config for the test database (migrate will be found in PATH)
+
+        Tests marked ``nodb`` get a placeholder URL without setting up the
+        database, unless they request the database themselves.
+        """
+        # Database state seeded by a test only counts if the wrapper uses it
+        uses_db = {"db_url", "set_db_version"}.intersection(request.fixturenames)
+        if request.node.get_closest_marker("nodb") and not uses_db:
+            db_url = NODB_URL
+        else:
+            db_url = request.getfixturevalue("db_url")
+        return MigrateConfig(database_url=db_url, migrations_path=migrations_dir)
+
+    @pytest.fixture
+    def wrapper(self, config):
+        """Wrapper instance for the test database"""
+        return MigrateWrapper(config)
+
+    @pytest.fixture
+    def mock_run(self, monkeypatch):
+        """Replace subprocess.run used by migrate commands with a mock"""
+        mock = MagicMock(return_value=_OK)
+        monkeypatch.setattr(migrate_command.subprocess, "run", mock)
+        return mock
+
+    @pytest.fixture
+    def create_test_migration(self, migrations_dir, migration_templates):
+        """Callable creating migration files
+
+        Files are hard links to session-wide templates with the same content,
+        so identical SQL is only written once per session.
+        """
+
+        def create(version: int, name: str, up_sql: str, down_sql: str) -> Migration:
+            up_name, down_name = _migration_file_names(version, name)
+            up_file = migrations_dir / up_name
+            down_file = migrations_dir / down_name
+
+            for path, sql in ((up_file, up_sql), (down_file, down_sql)):
+                template = migration_templates / _template_name(sql)
+                if not template.exists():
+                    _write_file(template, sql)
+                try:
+                    os.link(template, path)
+                except FileExistsError:
+                    # Replace the link rather than writing through to the template
+                    os.unlink(path)
+                    os.link(template, path)
+                except OSError:
+                    # Hard links unsupported here
+                    _write_file(path, sql)
+
+            return Migration(
+                version=version, name=name, up_file=up_file, down_file=down_file
+            )
 
-class MigrateWrapperTestBase(unittest.TestCase, ABC):
-    """Base test class for MigrateWrapper with database-specific setup"""
-
-    def setUp(self):
-        """Set up test environment"""
-        # Create temporary directory for test
-        self.temp_dir = tempfile.mkdtemp()
-        self.migrations_dir = Path(self.temp_dir) / "migrations"
-        self.migrations_dir.mkdir()
+        return create
 
-        # Add .bin directory to PATH
-        project_root = Path(__file__).parent.parent
-        bin_path = project_root / "bin"
-        self.original_path = os.environ.get("PATH", "")
-        os.environ["PATH"] = f"{bin_path}:{self.original_path}"
 
-        # Database-specific setup
-        self.db_url = self.setup_database()
+class TestMigrateConfig:
+    """Test MigrateConfig class"""
 
-        # Create config (migrate will be found in PATH)
-        self.config = MigrateConfig(
-            database_url=self.db_url, migrations_path=self.migrations_dir
+    def test_config_validation_success(self, monkeypatch):
+        """Test valid configuration"""
+        monkeypatch.setattr(Path, "exists", lambda self: True)
+        config = MigrateConfig(
+            database_url="sqlite://test.db", migrations_path="/migrations"
         )
+        config.validate()  # Should not raise
 
-        # Create wrapper instance
-        self.wrapper = MigrateWrapper(self.config)
+    def test_config_validation_missing_url(self):
+        """Test validation with missing database URL"""
+        # The URL is checked before the migrations path
+        config = MigrateConfig(database_url="", migrations_path="/migrations")
+        with pytest.raises(ValueError) as ctx:
+            config.validate()
+        assert "Database URL is required" in str(ctx.value)
 
-    def tearDown(self):
-        """Clean up test environment"""
-        self.cleanup_database()
-        shutil.rmtree(self.temp_dir)
-        # Restore original PATH
-        os.environ["PATH"] = self.original_path
+    def test_config_validation_missing_path(self):
+        """Test validation with non-existent migrations path"""
+        config = MigrateConfig(
+            database_url="sqlite://test.db", migrations_path="/non/existent/path"
+        )
+        with pytest.raises(ValueError) as ctx:
+            config.validate()
+        assert "Migrations path does not exist" in str(ctx.value)
 
-    @abstractmethod
-    def setup_database(self) -> str:
-        """Setup database and return connection URL"""
-        pass
 
-    @abstractmethod
-    def cleanup_database(self):
-        """Cleanup database resources"""
-        pass
+class TestMigrateCommand:
+    """Test migrate command resolution"""
 
-    @abstractmethod
-    def create_schema_migrations_table(self):
-        """Create schema_migrations table manually for testing"""
-        pass
+    @staticmethod
+    def _install_migrate(bin_dir: Path) -> Path:
+        """Create an executable migrate stub in bin_dir"""
+        bin_dir.mkdir(exist_ok=True)
+        command = bin_dir / "migrate"
+        command.write_text("#!/bin/sh\n")
+        command.chmod(0o755)
+        return command
 
-    @abstractmethod
-    def set_db_version(self, version: int, dirty: bool = False):
-        """Set database version manually for testing"""
-        pass
+    def test_relative_command_resolved_per_directory(self, tmp_path, monkeypatch):
+        """Test a relative command path resolves to an absolute path per cwd"""
+        command = self._install_migrate(tmp_path / "bin")
+        config = MigrateConfig(
+            database_url=NODB_URL,
+            migrations_path=tmp_path,
+            command_path=os.path.join("bin", "migrate"),
+        )
 
-    def create_test_migration(
-        self, version: int, name: str, up_sql: str, down_sql: str
-    ):
-        """Helper to create migration files"""
-        up_file = self.migrations_dir / f"{version:06d}_{name}.up.sql"
-        down_file = self.migrations_dir / f"{version:06d}_{name}.down.sql"
+        monkeypatch.chdir(tmp_path)
+        assert MigrateCommand(config)._resolved_path == str(command)
 
-        up_file.write_text(up_sql)
-        down_file.write_text(down_sql)
+        monkeypatch.chdir(tmp_path / "bin")
+        with pytest.raises(MigrateNotFoundError):
+            MigrateCommand(config)
 
-        return Migration(
-            version=version, name=name, up_file=up_file, down_file=down_file
+    def test_missing_command_not_cached(self, tmp_path):
+        """Test a command installed after a failed lookup is found"""
+        command_path = str(tmp_path / "bin" / "migrate")
+        config = MigrateConfig(
+            database_url=NODB_URL, migrations_path=tmp_path, command_path=command_path
         )
 
+        with pytest.raises(MigrateNotFoundError):
+            MigrateCommand(config)
 
-class TestMigrateConfig(unittest.TestCase):
-    """Test MigrateConfig class"""
-
-    def test_config_validation_success(self):
-        """Test valid configuration"""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            config = MigrateConfig(
-                database_url="sqlite://test.db", migrations_path=temp_dir
-            )
-            config.validate()  # Should not raise
+        self._install_migrate(tmp_path / "bin")
+        assert MigrateCommand(config)._resolved_path == command_path
 
-    def test_config_validation_missing_url(self):
-        """Test validation with missing database URL"""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            config = MigrateConfig(database_url="", migrations_path=temp_dir)
-            with self.assertRaises(ValueError) as ctx:
-                config.validate()
-            self.assertIn("Database URL is required", str(ctx.exception))
 
-    def test_config_validation_missing_path(self):
-        """Test validation with non-existent migrations path"""
-        config = MigrateConfig(
-            database_url="sqlite://test.db", migrations_path="/non/existent/path"
-        )
-        with self.assertRaises(ValueError) as ctx:
-            config.validate()
-        self.assertIn("Migrations path does not exist", str(ctx.exception))
+class MigrateWrapperTestMixin:
+    """Mixin containing common test methods for MigrateWrapper
 
+    migrate is mocked in these tests, so the wrapper is configured without a
+    database. Tests that seed database state use ``set_db_version``, which
+    sets up the database and configures the wrapper for it.
+    """
 
-class MigrateWrapperTestMixin:
-    """Mixin containing common test methods for MigrateWrapper"""
+    pytestmark = pytest.mark.nodb
 
     # Create command tests
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_create_sequential(self, mock_run):
+    def test_create_sequential(self, mock_run, wrapper, create_test_migration):
         """Test creating sequential migration"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
-
         # Create mock files that would be created by migrate
-        self.create_test_migration(1, "test_migration", "", "")
+        create_test_migration(1, "test_migration", "", "")
 
-        result = self.wrapper.create("test_migration", sequential=True)
+        result = wrapper.create("test_migration", sequential=True)
 
         # Verify command was called correctly
         mock_run.assert_called_once()
         args = mock_run.call_args[0][0]
-        self.assertIn("create", args)
-        self.assertIn("-seq", args)
-        self.assertIn("test_migration", args)
-        self.assertIsInstance(result, Migration)
+        assert "create" in args
+        assert "-seq" in args
+        assert "test_migration" in args
+        assert isinstance(result, Migration)
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_create_timestamp(self, mock_run):
+    def test_create_timestamp(self, mock_run, wrapper, create_test_migration):
         """Test creating timestamp-based migration"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
-
         # Create a fake migration file for the test
-        self.create_test_migration(1, "test_migration", "", "")
+        create_test_migration(1, "test_migration", "", "")
 
-        result = self.wrapper.create("test_migration", sequential=False)
+        result = wrapper.create("test_migration", sequential=False)
 
         args = mock_run.call_args[0][0]
-        self.assertIn("create", args)
-        self.assertNotIn("-seq", args)
-        self.assertIsInstance(result, Migration)
+        assert "create" in args
+        assert "-seq" not in args
+        assert isinstance(result, Migration)
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_create_with_different_extension(self, mock_run):
+    def test_create_with_different_extension(
+        self, mock_run, wrapper, create_test_migration
+    ):
         """Test creating migration with different extension"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
-
         # Create a fake migration file for the test
-        self.create_test_migration(1, "test_migration", "", "")
+        create_test_migration(1, "test_migration", "", "")
 
-        result = self.wrapper.create("test_migration", extension="go")
+        result = wrapper.create("test_migration", extension="go")
 
         args = mock_run.call_args[0][0]
-        self.assertIn("-ext", args)
-        self.assertIn("go", args)
-        self.assertIsInstance(result, Migration)
-
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_create_failure(self, mock_run):
-        """Test handling creation failure"""
-        mock_run.return_value = MagicMock(
-            returncode=1, stdout="", stderr="Failed to create migration"
+        assert "-ext" in args
+        assert "go" in args
+        assert isinstance(result, Migration)
+
+    def test_create_uses_reported_file(self, mock_run, wrapper, create_test_migration):
+        """Test create() returns the migration reported in migrate's output"""
+        create_test_migration(1, "first", "", "")
+        created = create_test_migration(2, "second", "", "")
+        create_test_migration(3, "third", "", "")
+        mock_run.return_value = SimpleNamespace(
+            returncode=0,
+            stdout=b"",
+            stderr=f"{created.up_file}\n{created.down_file}\n".encode(),
         )
 
-        with self.assertRaises(MigrateError) as ctx:
-            self.wrapper.create("test_migration")
-        self.assertIn("Failed to create migration", str(ctx.exception))
-
-    # Up command tests
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_up_all_success(self, mock_run):
-        """Test applying all migrations successfully"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
-
-        result = self.wrapper.up()
-
-        self.assertTrue(result.success)
-        self.assertEqual(result.message, "Migrations applied successfully")
-        self.assertFalse(result.dirty)
-
-        # Check the first call (up command)
-        up_args = mock_run.call_args_list[0][0][0]
-        self.assertIn("up", up_args)
-
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_up_with_steps(self, mock_run):
-        """Test applying specific number of migrations"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
-
-        self.wrapper.up(steps=2)
-
-        # Check the first call (up command)
-        up_args = mock_run.call_args_list[0][0][0]
-        self.assertIn("up", up_args)
-        self.assertIn("2", up_args)
-
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_up_dirty_state(self, mock_run):
-        """Test up command when database is dirty"""
-        mock_run.return_value = MagicMock(
-            returncode=1, stdout="", stderr="error: Dirty database version"
-        )
+        result = wrapper.create("second")
 
-        with self.assertRaises(MigrateDirtyError):
-            self.wrapper.up()
+        assert result.version == 2
+        assert result.name == "second"
+        assert result.up_file == created.up_file
+        assert result.down_file == created.down_file
+        assert result.has_down_file()
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_up_already_latest(self, mock_run):
-        """Test up when already at latest version"""
-        mock_run.return_value = MagicMock(
-            returncode=1, stdout="", stderr="no change: already at the latest version"
+    def test_create_reported_path_with_spaces(self, mock_run, wrapper, tmp_path):
+        """Test create() keeps reported file paths containing spaces"""
+        up_file = tmp_path / "my migrations" / "000001_first.up.sql"
+        down_file = tmp_path / "my migrations" / "000001_first.down.sql"
+        mock_run.return_value = SimpleNamespace(
+            returncode=0,
+            stdout=b"",
+            stderr=f"{up_file}\n{down_file}\n".encode(),
         )
 
-        result = self.wrapper.up()
+        result = wrapper.create("first")
 
-        self.assertFalse(result.success)
-        self.assertEqual(result.message, "Already at latest version")
+        assert result.version == 1
+        assert result.up_file == up_file
+        assert result.down_file == down_file
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_up_sql_error(self, mock_run):
-        """Test up with SQL execution error"""
-        mock_run.return_value = MagicMock(
-            returncode=1, stdout="", stderr="migration failed: syntax error"
+    def test_create_failure(self, mock_run, wrapper):
+        """Test handling creation failure"""
+        mock_run.return_value = SimpleNamespace(
+            returncode=1, stdout=b"", stderr=b"Failed to create migration"
         )
 
-        result = self.wrapper.up()
-
-        self.assertFalse(result.success)
-        self.assertIn("syntax error", result.message)
-
-    # Down command tests
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_down_single_success(self, mock_run):
-        """Test rolling back single migration"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
-
-        result = self.wrapper.down(steps=1)
-
-        self.assertTrue(result.success)
-        self.assertEqual(result.message, "Migrations rolled back successfully")
-
-        # Check the first call (down command)
-        down_args = mock_run.call_args_list[0][0][0]
-        self.assertIn("down", down_args)
-        self.assertIn("1", down_args)
-
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_down_all(self, mock_run):
-        """Test rolling back all migrations"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
-
-        self.wrapper.down()
-
-        # Check the first call (down command)
-        down_args = mock_run.call_args_list[0][0][0]
-        self.assertIn("down", down_args)
-        self.assertIn("-all", down_args)
+        with pytest.raises(MigrateError) as ctx:
+            wrapper.create("test_migration")
+        assert "Failed to create migration" in str(ctx.value)
+
+    # Outcome tests shared by the migrating commands
+    @pytest.mark.parametrize(
+        "method,kwargs,expected_args,version,message",
+        [
+            ("up", {}, ["up"], None, "Migrations applied successfully"),
+            ("up", {"steps": 2}, ["up", "2"], None, "Migrations applied successfully"),
+            (
+                "down",
+                {"steps": 1},
+                ["down", "1"],
+                None,
+                "Migrations rolled back successfully",
+            ),
+            ("down", {}, ["down", "-all"], None, "Migrations rolled back successfully"),
+            ("goto", {"version": 3}, ["goto", "3"], 3, "Migrated to version 3"),
+            ("goto", {"version": 0}, ["goto", "0"], None, "Migrated to version 0"),
+            ("force", {"version": 5}, ["force", "5"], 5, "Forced version to 5"),
+            (
+                "drop",
+                {"force": True},
+                ["drop", "-f"],
+                None,
+                "Database dropped successfully",
+            ),
+        ],
+    )
+    def test_command_success(
+        self, mock_run, wrapper, method, kwargs, expected_args, version, message
+    ):
+        """Test successful commands pass their arguments and report the result"""
+        result = getattr(wrapper, method)(**kwargs)
+
+        assert result.success
+        assert result.version == version
+        assert result.message == message
+        assert not result.dirty
+
+        # The first call is the command itself
+        args = mock_run.call_args_list[0][0][0]
+        for arg in expected_args:
+            assert arg in args
+
+    @pytest.mark.parametrize(
+        "method,kwargs,stderr,message,exact",
+        [
+            (
+                "up",
+                {},
+                b"no change: already at the latest version",
+                "Already at latest version",
+                True,
+            ),
+            ("up", {}, b"migration failed: syntax error", "syntax error", False),
+            ("down", {}, b"no migration to rollback", "No migrations found", False),
+            ("goto", {"version": 999}, b"migration not found", "not found", False),
+            ("force", {"version": 5}, b"force failed", "force failed", True),
+        ],
+    )
+    def test_command_failure(
+        self, mock_run, wrapper, method, kwargs, stderr, message, exact
+    ):
+        """Test failed commands report migrate's error"""
+        mock_run.return_value = SimpleNamespace(returncode=1, stdout=b"", stderr=stderr)
+
+        result = getattr(wrapper, method)(**kwargs)
+
+        assert not result.success
+        if exact:
+            assert result.message == message
+        else:
+            assert message in result.message
+
+    @pytest.mark.parametrize(
+        "method,kwargs,stderr",
+        [
+            ("up", {}, b"error: Dirty database version"),
+            ("down", {}, b"error: Dirty database"),
+            ("goto", {"version": 3}, b"error: Dirty database"),
+        ],
+    )
+    def test_command_dirty_state(self, mock_run, wrapper, method, kwargs, stderr):
+        """Test commands raise when the database is dirty"""
+        mock_run.return_value = SimpleNamespace(returncode=1, stdout=b"", stderr=stderr)
+
+        with pytest.raises(MigrateDirtyError):
+            getattr(wrapper, method)(**kwargs)
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_down_from_dirty_state(self, mock_run):
-        """Test down from dirty state"""
-        mock_run.return_value = MagicMock(
-            returncode=1, stdout="", stderr="error: Dirty database"
+    # Up command tests
+    def test_up_version_from_output(self, mock_run, wrapper):
+        """Test up() takes the new version from migrate's progress output"""
+        mock_run.return_value = SimpleNamespace(
+            returncode=0,
+            stdout=b"",
+            stderr=b"1/u first (1.2ms)\n2/u second (2.3ms)\n",
         )
 
-        with self.assertRaises(MigrateDirtyError):
-            self.wrapper.down()
+        result = wrapper.up()
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_down_no_migrations(self, mock_run):
-        """Test down when no migrations to rollback"""
-        mock_run.return_value = MagicMock(
-            returncode=1, stdout="", stderr="no migration to rollback"
-        )
+        assert result.success
+        assert result.version == 2
+        mock_run.assert_called_once()
 
-        result = self.wrapper.down()
+    def test_up_all_predicts_latest_version(
+        self, mock_run, wrapper, create_test_migration
+    ):
+        """Test up() without steps reports the latest migration version"""
+        create_test_migration(1, "first", "", "")
+        create_test_migration(2, "second", "", "")
+        mock_run.return_value = _OK
 
-        self.assertFalse(result.success)
-        self.assertIn("No migrations found", result.message)
+        result = wrapper.up()
 
-    # Goto command tests
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_goto_specific_version(self, mock_run):
-        """Test going to specific version"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
+        assert result.version == 2
+        mock_run.assert_called_once()
 
-        result = self.wrapper.goto(version=3)
+    def test_steps_use_known_version(self, mock_run, wrapper, create_test_migration):
+        """Test stepped up/down derive the version from the last known one"""
+        create_test_migration(1, "first", "", "")
+        create_test_migration(2, "second", "", "")
+        create_test_migration(3, "third", "", "")
+        mock_run.return_value = _OK
 
-        self.assertTrue(result.success)
-        self.assertEqual(result.version, 3)
-        self.assertEqual(result.message, "Migrated to version 3")
+        wrapper.goto(version=1)
+        assert wrapper.up(steps=2).version == 3
+        assert wrapper.down(steps=1).version == 2
+        assert wrapper.down(steps=2).version is None
 
-        args = mock_run.call_args[0][0]
-        self.assertIn("goto", args)
-        self.assertIn("3", args)
+        assert mock_run.call_count == 4
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_goto_zero(self, mock_run):
-        """Test going to initial state (version 0)"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
+    def test_steps_query_unknown_version(
+        self, mock_run, wrapper, create_test_migration
+    ):
+        """Test stepped moves query the version when it is not known"""
+        create_test_migration(1, "first", "", "")
+        create_test_migration(2, "second", "", "")
+        mock_run.side_effect = _results((0, b"", b""), (0, b"", b"1\n"))
 
-        self.wrapper.goto(version=0)
+        result = wrapper.down(steps=1)
 
-        args = mock_run.call_args[0][0]
-        self.assertIn("goto", args)
-        self.assertIn("0", args)
+        assert result.version == 1
+        assert mock_run.call_count == 2
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_goto_non_existent(self, mock_run):
-        """Test going to non-existent version"""
-        mock_run.return_value = MagicMock(
-            returncode=1, stdout="", stderr="migration not found"
+    # Down command tests
+    def test_down_version_from_output(self, mock_run, wrapper, create_test_migration):
+        """Test down() derives the new version from rolled back migrations"""
+        create_test_migration(1, "first", "", "")
+        create_test_migration(2, "second", "", "")
+        create_test_migration(3, "third", "", "")
+        mock_run.return_value = SimpleNamespace(
+            returncode=0, stdout=b"", stderr=b"3/d third (1.2ms)\n"
         )
 
-        result = self.wrapper.goto(version=999)
+        result = wrapper.down(steps=1)
 
-        self.assertFalse(result.success)
-        self.assertIn("not found", result.message)
+        assert result.success
+        assert result.version == 2
+        mock_run.assert_called_once()
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_goto_from_dirty_state(self, mock_run):
-        """Test goto from dirty state"""
-        mock_run.return_value = MagicMock(
-            returncode=1, stdout="", stderr="error: Dirty database"
+        mock_run.return_value = SimpleNamespace(
+            returncode=0, stdout=b"", stderr=b"2/d second (1ms)\n1/d first (1ms)\n"
         )
 
-        with self.assertRaises(MigrateDirtyError):
-            self.wrapper.goto(version=3)
+        result = wrapper.down()
 
-    # Force command tests
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_force_version(self, mock_run):
-        """Test forcing version"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
+        assert result.version is None
 
-        result = self.wrapper.force(version=5)
-
-        self.assertTrue(result.success)
-        self.assertEqual(result.version, 5)
-        self.assertFalse(result.dirty)
-
-        args = mock_run.call_args[0][0]
-        self.assertIn("force", args)
-        self.assertIn("5", args)
-
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_force_to_clean_dirty_state(self, mock_run):
+    # Force command tests
+    def test_force_to_clean_dirty_state(self, mock_run, wrapper, set_db_version):
         """Test using force to clean dirty state"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
-
         # Simulate dirty state
-        self.set_db_version(3, dirty=True)
+        set_db_version(3, dirty=True)
+        assert wrapper.config.database_url != NODB_URL
 
-        result = self.wrapper.force(version=3)
+        result = wrapper.force(version=3)
 
-        self.assertTrue(result.success)
-        self.assertFalse(result.dirty)
-        self.assertEqual(result.message, "Forced version to 3")
-
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_force_failure(self, mock_run):
-        """Test force command failure"""
-        mock_run.return_value = MagicMock(
-            returncode=1, stdout="", stderr="force failed"
-        )
-
-        result = self.wrapper.force(version=5)
-
-        self.assertFalse(result.success)
-        self.assertEqual(result.message, "force failed")
+        assert result.success
+        assert not result.dirty
+        assert result.message == "Forced version to 3"
 
     # Drop command tests
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_drop_with_force(self, mock_run):
-        """Test dropping database with force flag"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
-
-        result = self.wrapper.drop(force=True)
-
-        self.assertTrue(result.success)
-        self.assertIsNone(result.version)
-        self.assertEqual(result.message, "Database dropped successfully")
-
-        args = mock_run.call_args[0][0]
-        self.assertIn("drop", args)
-        self.assertIn("-f", args)
-
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_drop_without_force(self, mock_run):
+    def test_drop_without_force(self, mock_run, wrapper):
         """Test dropping database without force flag"""
-        mock_run.return_value = MagicMock(
-            returncode=1, stdout="", stderr="confirmation required"
+        mock_run.return_value = SimpleNamespace(
+            returncode=1, stdout=b"", stderr=b"confirmation required"
         )
 
-        result = self.wrapper.drop(force=False)
+        result = wrapper.drop(force=False)
 
-        self.assertFalse(result.success)
+        assert not result.success
 
         # Check the first call (drop command)
         drop_args = mock_run.call_args_list[0][0][0]
-        self.assertIn("drop", drop_args)
-        self.assertNotIn("-f", drop_args)
+        assert "drop" in drop_args
+        assert "-f" not in drop_args
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_drop_from_dirty_state(self, mock_run):
+    def test_drop_from_dirty_state(self, mock_run, wrapper, set_db_version):
         """Test dropping database from dirty state"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
-
         # Set dirty state
-        self.set_db_version(3, dirty=True)
+        set_db_version(3, dirty=True)
+        assert wrapper.config.database_url != NODB_URL
 
-        result = self.wrapper.drop(force=True)
+        result = wrapper.drop(force=True)
 
-        self.assertTrue(result.success)
+        assert result.success
 
     # Version command tests
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_version_with_migrations(self, mock_run):
+    def test_version_with_migrations(self, mock_run, wrapper):
         """Test getting version with migrations applied"""
-        mock_run.return_value = MagicMock(
-            returncode=0, stdout="version: 3\n", stderr=""
+        mock_run.return_value = SimpleNamespace(
+            returncode=0, stdout=b"version: 3\n", stderr=b""
         )
 
-        version = self.wrapper.version()
+        version = wrapper.version()
 
-        self.assertEqual(version, 3)
+        assert version == 3
 
         args = mock_run.call_args[0][0]
-        self.assertIn("version", args)
+        assert "version" in args
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_version_no_migrations(self, mock_run):
+    def test_version_no_migrations(self, mock_run, wrapper):
         """Test getting version with no migrations"""
-        mock_run.return_value = MagicMock(
-            returncode=0, stdout="no migration\n", stderr=""
+        mock_run.return_value = SimpleNamespace(
+            returncode=0, stdout=b"no migration\n", stderr=b""
         )
 
-        version = self.wrapper.version()
+        version = wrapper.version()
 
-        self.assertIsNone(version)
+        assert version is None
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_version_dirty_state(self, mock_run):
+    def test_version_dirty_state(self, mock_run, wrapper):
         """Test getting version in dirty state"""
-        mock_run.return_value = MagicMock(
-            returncode=0, stdout="version: 3 (dirty)\n", stderr=""
+        mock_run.return_value = SimpleNamespace(
+            returncode=0, stdout=b"version: 3 (dirty)\n", stderr=b""
         )
 
-        version = self.wrapper.version()
+        version = wrapper.version()
 
-        self.assertEqual(version, 3)
+        assert version == 3
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_version_command_failure(self, mock_run):
+    def test_version_command_failure(self, mock_run, wrapper):
         """Test version command failure"""
-        mock_run.return_value = MagicMock(
-            returncode=1, stdout="", stderr="database connection failed"
+        mock_run.return_value = SimpleNamespace(
+            returncode=1, stdout=b"", stderr=b"database connection failed"
         )
 
-        version = self.wrapper.version()
+        version = wrapper.version()
 
-        self.assertIsNone(version)
+        assert version is None
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_version_handles_stderr_output(self, mock_run):
+    def test_version_handles_stderr_output(self, mock_run, wrapper):
         """Test version() correctly parses version from stderr"""
-        mock_run.return_value = MagicMock(
-            returncode=0, stdout="", stderr="1\n"  # Empty stdout  # Version in stderr
+        mock_run.return_value = SimpleNamespace(
+            returncode=0, stdout=b"", stderr=b"1\n"  # Empty stdout  # Version in stderr
         )
 
-        version = self.wrapper.version()
+        version = wrapper.version()
 
-        self.assertEqual(version, 1)
+        assert version == 1
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_version_prefers_stdout_over_stderr(self, mock_run):
+    def test_version_prefers_stdout_over_stderr(self, mock_run, wrapper):
         """Test version() prefers stdout when both stdout and stderr have content"""
-        mock_run.return_value = MagicMock(
+        mock_run.return_value = SimpleNamespace(
             returncode=0,
-            stdout="2\n",  # Version in stdout
-            stderr="1\n",  # Different version in stderr
+            stdout=b"2\n",  # Version in stdout
+            stderr=b"1\n",  # Different version in stderr
         )
 
-        version = self.wrapper.version()
+        version = wrapper.version()
 
-        self.assertEqual(version, 2)
+        assert version == 2
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_version_handles_dirty_state_in_stderr(self, mock_run):
+    def test_version_handles_dirty_state_in_stderr(self, mock_run, wrapper):
         """Test version() handles dirty state marker in stderr"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="3 (dirty)\n")
-
-        version = self.wrapper.version()
-
-        self.assertEqual(version, 3)
+        mock_run.return_value = SimpleNamespace(
+            returncode=0, stdout=b"", stderr=b"3 (dirty)\n"
+        )
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_version_handles_various_stderr_formats(self, mock_run):
+        version = wrapper.version()
+
+        assert version == 3
+
+    @pytest.mark.parametrize(
+        "stderr_output,expected_version",
+        [
+            (b"5\n", 5),
+            (b"version: 7\n", 7),
+            (b"42\n", 42),
+            (b"version: 99 (dirty)\n", 99),
+        ],
+    )
+    def test_version_handles_various_stderr_formats(
+        self, mock_run, wrapper, stderr_output, expected_version
+    ):
         """Test version() handles various output formats when in stderr"""
-        test_cases = [
-            ("5\n", 5),
-            ("version: 7\n", 7),
-            ("42\n", 42),
-            ("version: 99 (dirty)\n", 99),
-        ]
-
-        for stderr_output, expected_version in test_cases:
-            with self.subTest(stderr_output=stderr_output):
-                mock_run.return_value = MagicMock(
-                    returncode=0, stdout="", stderr=stderr_output
-                )
+        mock_run.return_value = SimpleNamespace(
+            returncode=0, stdout=b"", stderr=stderr_output
+        )
 
-                version = self.wrapper.version()
+        version = wrapper.version()
 
-                self.assertEqual(version, expected_version)
+        assert version == expected_version
 
     # Status command tests
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_status_clean(self, mock_run):
+    def test_status_clean(self, mock_run, wrapper):
         """Test getting clean status"""
-        mock_run.return_value = MagicMock(
-            returncode=0, stdout="version: 3\n", stderr=""
+        mock_run.return_value = SimpleNamespace(
+            returncode=0, stdout=b"version: 3\n", stderr=b""
         )
 
-        status = self.wrapper.status()
+        status = wrapper.status()
 
-        self.assertEqual(status.version, 3)
-        self.assertFalse(status.dirty)
-        self.assertTrue(status.is_clean)
+        assert status.version == 3
+        assert not status.dirty
+        assert status.is_clean
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_status_dirty(self, mock_run):
+    def test_status_dirty(self, mock_run, wrapper):
         """Test getting dirty status"""
-        mock_run.return_value = MagicMock(
-            returncode=0, stdout="version: 3 (dirty)\n", stderr=""
+        mock_run.return_value = SimpleNamespace(
+            returncode=0, stdout=b"version: 3 (dirty)\n", stderr=b""
         )
 
-        status = self.wrapper.status()
+        status = wrapper.status()
 
-        self.assertEqual(status.version, 3)
-        self.assertTrue(status.dirty)
-        self.assertFalse(status.is_clean)
+        assert status.version == 3
+        assert status.dirty
+        assert not status.is_clean
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_status_no_version(self, mock_run):
+    def test_status_no_version(self, mock_run, wrapper):
         """Test status with no version"""
-        mock_run.return_value = MagicMock(
-            returncode=0, stdout="no migration\n", stderr=""
+        mock_run.return_value = SimpleNamespace(
+            returncode=0, stdout=b"no migration\n", stderr=b""
         )
 
-        status = self.wrapper.status()
+        status = wrapper.status()
 
-        self.assertIsNone(status.version)
-        self.assertFalse(status.dirty)
+        assert status.version is None
+        assert not status.dirty
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_status_handles_stderr_output(self, mock_run):
+    def test_status_handles_stderr_output(self, mock_run, wrapper):
         """Test status() method also correctly handles stderr output"""
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="5 (dirty)\n")
+        mock_run.return_value = SimpleNamespace(
+            returncode=0, stdout=b"", stderr=b"5 (dirty)\n"
+        )
 
-        status = self.wrapper.status()
+        status = wrapper.status()
+
+        assert status.version == 5
+        assert status.dirty
+        assert not status.is_clean
+
+    # Async command tests
+    @patch.object(migrate_command.asyncio, "create_subprocess_exec")
+    def test_up_async(self, mock_exec, wrapper):
+        """Test applying migrations through the asyncio subprocess API"""
+        process = MagicMock(returncode=0)
+        process.communicate = AsyncMock(return_value=(b"", b"1/u first (1ms)\n"))
+        mock_exec.return_value = process
+
+        result = asyncio.run(wrapper.up_async(steps=1))
+
+        assert result.success
+        assert result.version == 1
+        args = mock_exec.call_args[0]
+        assert "up" in args
+        assert "1" in args
+
+    @patch.object(migrate_command.asyncio, "create_subprocess_exec")
+    def test_up_async_failure_queries_version_async(self, mock_exec, mock_run, wrapper):
+        """Test a failed up_async reads the version without blocking"""
+        failed = MagicMock(returncode=1)
+        failed.communicate = AsyncMock(return_value=(b"", b"no change\n"))
+        version = MagicMock(returncode=0)
+        version.communicate = AsyncMock(return_value=(b"", b"2\n"))
+        mock_exec.side_effect = [failed, version]
+
+        result = asyncio.run(wrapper.up_async())
+
+        assert not result.success
+        assert result.version == 2
+        assert mock_exec.call_count == 2
+        assert "version" in mock_exec.call_args[0]
+        mock_run.assert_not_called()
+
+    @patch.object(migrate_command.asyncio, "create_subprocess_exec")
+    def test_up_async_steps_query_version_async(
+        self, mock_exec, mock_run, wrapper, create_test_migration
+    ):
+        """Test up_async queries an unknown version without blocking"""
+        create_test_migration(1, "first", "", "")
+        create_test_migration(2, "second", "", "")
+        applied = MagicMock(returncode=0)
+        applied.communicate = AsyncMock(return_value=(b"", b""))
+        version = MagicMock(returncode=0)
+        version.communicate = AsyncMock(return_value=(b"", b"1\n"))
+        mock_exec.side_effect = [applied, version]
+
+        result = asyncio.run(wrapper.up_async(steps=1))
+
+        assert result.success
+        assert result.version == 1
+        assert mock_exec.call_count == 2
+        mock_run.assert_not_called()
+
+    @patch.object(migrate_command.asyncio, "create_subprocess_exec")
+    def test_status_async(self, mock_exec, wrapper):
+        """Test getting status through the asyncio subprocess API"""
+        process = MagicMock(returncode=0)
+        process.communicate = AsyncMock(return_value=(b"", b"4 (dirty)\n"))
+        mock_exec.return_value = process
+
+        status = asyncio.run(wrapper.status_async())
+
+        assert status.version == 4
+        assert status.dirty
+        assert "version" in mock_exec.call_args[0]
+
+    # Status pool tests
+    def test_pool_shares_status(self, mock_run, config):
+        """Test wrappers sharing a pool reuse status until a migration runs"""
+        pool = MigratePool(ttl=60)
+        first = MigrateWrapper(config, pool=pool)
+        second = MigrateWrapper(config, pool=pool)
+        mock_run.return_value = SimpleNamespace(
+            returncode=0, stdout=b"", stderr=b"3 (dirty)\n"
+        )
 
-        self.assertEqual(status.version, 5)
-        self.assertTrue(status.dirty)
-        self.assertFalse(status.is_clean)
+        assert first.status().version == 3
+        assert second.status().dirty
+        assert second.version() == 3
+        assert mock_run.call_count == 1
+
+        first.force(version=3)
+        mock_run.return_value = SimpleNamespace(returncode=0, stdout=b"", stderr=b"3\n")
+
+        assert not second.status().dirty
+        assert mock_run.call_count == 3
+
+    def test_pool_hit_tracks_version(self, mock_run, config, create_test_migration):
+        """Test a pooled version is tracked and pooled status is not shared"""
+        for version in range(1, 5):
+            create_test_migration(version, f"m{version}", "", "")
+        pool = MigratePool(ttl=60)
+        first = MigrateWrapper(config, pool=pool)
+        second = MigrateWrapper(config, pool=pool)
+        mock_run.return_value = SimpleNamespace(returncode=0, stdout=b"", stderr=b"3\n")
+
+        info = first.status()
+        info.dirty = True
+        assert not second.status().dirty
+        assert second.version() == 3
+        assert mock_run.call_count == 1
+
+        # The pooled version lets a stepped up predict its result
+        mock_run.return_value = _OK
+        assert second.up(steps=1).version == 4
+        assert mock_run.call_count == 2
+
+    @patch.object(migrate_command.asyncio, "create_subprocess_exec")
+    def test_pool_shares_status_async(self, mock_exec, mock_run, config):
+        """Test status_async reads and fills the shared pool like status()"""
+        pool = MigratePool(ttl=60)
+        first = MigrateWrapper(config, pool=pool)
+        second = MigrateWrapper(config, pool=pool)
+        process = MagicMock(returncode=0)
+        process.communicate = AsyncMock(return_value=(b"", b"5\n"))
+        mock_exec.return_value = process
+
+        assert asyncio.run(first.status_async()).version == 5
+        assert asyncio.run(second.status_async()).version == 5
+        assert second.status().version == 5
+        assert mock_exec.call_count == 1
+        mock_run.assert_not_called()
 
     # Validation tests
-    def test_validate_empty(self):
+    def test_validate_empty(self, wrapper):
         """Test validation with no migrations"""
-        validation = self.wrapper.validate_migrations()
+        validation = wrapper.validate_migrations()
 
-        self.assertTrue(validation.valid)
-        self.assertEqual(validation.total_migrations, 0)
-        self.assertEqual(validation.gaps, [])
-        self.assertEqual(validation.missing_down_files, [])
+        assert validation.valid
+        assert validation.total_migrations == 0
+        assert validation.gaps == []
+        assert validation.missing_down_files == []
 
-    def test_validate_with_gaps(self):
+    def test_validate_with_gaps(self, wrapper, create_test_migration):
         """Test validation with gaps in sequence"""
-        self.create_test_migration(1, "first", "CREATE TABLE a;", "DROP TABLE a;")
-        self.create_test_migration(3, "third", "CREATE TABLE c;", "DROP TABLE c;")
+        create_test_migration(1, "first", "CREATE TABLE a;", "DROP TABLE a;")
+        create_test_migration(3, "third", "CREATE TABLE c;", "DROP TABLE c;")
+
+        validation = wrapper.validate_migrations()
+
+        assert not validation.valid
+        assert validation.gaps == [2]
+
+    def test_list_ignores_other_sql_files(
+        self, wrapper, migrations_dir, create_test_migration
+    ):
+        """Test non-migration .sql files are not listed"""
+        create_test_migration(1, "first", "CREATE TABLE a;", "DROP TABLE a;")
+        (migrations_dir / "schema.sql").write_text("CREATE TABLE s;")
+        (migrations_dir / "000002_seed.sql").write_text("INSERT 1;")
+        (migrations_dir / "000003_notes.up.txt").write_text("notes")
+
+        migrations = wrapper.list_migrations()
+
+        assert [m.version for m in migrations] == [1]
+
+    def test_validate_timestamp_versions(self, wrapper, create_test_migration):
+        """Test validation ignores gaps between timestamp versions"""
+        create_test_migration(
+            20240101120000, "first", "CREATE TABLE a;", "DROP TABLE a;"
+        )
+        create_test_migration(
+            20240102120000, "second", "CREATE TABLE b;", "DROP TABLE b;"
+        )
 
-        validation = self.wrapper.validate_migrations()
+        validation = wrapper.validate_migrations()
 
-        self.assertFalse(validation.valid)
-        self.assertEqual(validation.gaps, [2])
+        assert validation.valid
+        assert validation.gaps == []
 
-    def test_validate_missing_down_files(self):
+    def test_validate_missing_down_files(self, wrapper, migrations_dir):
         """Test validation with missing down files"""
         # Create migration with only up file
-        up_file = self.migrations_dir / "000001_test.up.sql"
+        up_file = migrations_dir / "000001_test.up.sql"
         up_file.write_text("CREATE TABLE test;")
 
-        validation = self.wrapper.validate_migrations()
+        validation = wrapper.validate_migrations()
 
-        self.assertFalse(validation.valid)
-        self.assertEqual(len(validation.missing_down_files), 1)
+        assert not validation.valid
+        assert len(validation.missing_down_files) == 1
 
-    def test_validate_all_good(self):
+    def test_validate_all_good(self, wrapper, create_test_migration):
         """Test validation with valid migrations"""
-        self.create_test_migration(1, "first", "CREATE TABLE a;", "DROP TABLE a;")
-        self.create_test_migration(2, "second", "CREATE TABLE b;", "DROP TABLE b;")
-        self.create_test_migration(3, "third", "CREATE TABLE c;", "DROP TABLE c;")
+        create_test_migration(1, "first", "CREATE TABLE a;", "DROP TABLE a;")
+        create_test_migration(2, "second", "CREATE TABLE b;", "DROP TABLE b;")
+        create_test_migration(3, "third", "CREATE TABLE c;", "DROP TABLE c;")
+
+        validation = wrapper.validate_migrations()
+
+        assert validation.valid
+        assert validation.total_migrations == 3
+        assert validation.gaps == []
+        assert validation.missing_down_files == []
+
+    def test_is_valid(self, wrapper, migrations_dir, create_test_migration):
+        """Test is_valid() agrees with validate_migrations()"""
+        assert wrapper.is_valid()
+
+        create_test_migration(1, "first", "CREATE TABLE a;", "DROP TABLE a;")
+        create_test_migration(3, "third", "CREATE TABLE c;", "DROP TABLE c;")
+        assert not wrapper.is_valid()
+
+        create_test_migration(2, "second", "CREATE TABLE b;", "DROP TABLE b;")
+        assert wrapper.is_valid()
+
+        (migrations_dir / "000004_fourth.up.sql").write_text("CREATE TABLE d;")
+        assert not wrapper.is_valid()
+        assert not wrapper.validate_migrations().valid
 
-        validation = self.wrapper.validate_migrations()
+    def test_validate_many(self, migrations_dir, tmp_path, create_test_migration):
+        """Test validating several migration directories in parallel"""
+        create_test_migration(1, "first", "CREATE TABLE a;", "DROP TABLE a;")
+        create_test_migration(3, "third", "CREATE TABLE c;", "DROP TABLE c;")
+        empty_dir = tmp_path / "empty"
+        empty_dir.mkdir()
 
-        self.assertTrue(validation.valid)
-        self.assertEqual(validation.total_migrations, 3)
-        self.assertEqual(validation.gaps, [])
-        self.assertEqual(validation.missing_down_files, [])
+        results = MigrateWrapper.validate_many([migrations_dir, empty_dir])
+
+        assert len(results) == 2
+        assert not results[0].valid
+        assert results[0].gaps == [2]
+        assert results[1].valid
+        assert results[1].total_migrations == 0
+
+    def test_validate_missing_directory(self, tmp_path):
+        """Test validating a directory that doesn't exist yet"""
+        missing_dir = tmp_path / "missing"
+
+        result = validate_one(missing_dir)
+        results = MigrateWrapper.validate_many([missing_dir])
+
+        assert result.valid
+        assert result.total_migrations == 0
+        assert results == [result]
+
+    def test_scan_cached_until_directory_changes(
+        self, wrapper, migrations_dir, create_test_migration
+    ):
+        """Test scan results are reused while the directory is unchanged"""
+        create_test_migration(1, "first", "CREATE TABLE a;", "DROP TABLE a;")
+        old_mtime = 1_000_000_000_000_000_000
+        os.utime(migrations_dir, ns=(old_mtime, old_mtime))
+        assert len(wrapper.list_migrations()) == 1
+
+        # Add a file without changing the directory mtime
+        create_test_migration(2, "second", "CREATE TABLE b;", "DROP TABLE b;")
+        os.utime(migrations_dir, ns=(old_mtime, old_mtime))
+        assert len(wrapper.list_migrations()) == 1
+        assert len(wrapper.scanner.scan(force=True)) == 2
+
+        # Any directory change invalidates the cache
+        create_test_migration(3, "third", "CREATE TABLE c;", "DROP TABLE c;")
+        assert len(wrapper.list_migrations()) == 3
+
+    def test_scan_missing_directory_not_cached(
+        self, wrapper, migrations_dir, create_test_migration
+    ):
+        """Test a removed directory scans empty and is rescanned when recreated"""
+        create_test_migration(1, "first", "CREATE TABLE a;", "DROP TABLE a;")
+        old_mtime = 1_000_000_000_000_000_000
+        os.utime(migrations_dir, ns=(old_mtime, old_mtime))
+        assert len(wrapper.list_migrations()) == 1
+
+        for path in migrations_dir.iterdir():
+            path.unlink()
+        migrations_dir.rmdir()
+        assert wrapper.list_migrations() == []
+
+        # Recreated with the same mtime, the cached result must not return
+        migrations_dir.mkdir()
+        create_test_migration(1, "first", "CREATE TABLE a;", "DROP TABLE a;")
+        create_test_migration(2, "second", "CREATE TABLE b;", "DROP TABLE b;")
+        os.utime(migrations_dir, ns=(old_mtime, old_mtime))
+        assert len(wrapper.list_migrations()) == 2
 
     # Migration class tests
-    def test_migration_properties(self):
+    def test_migration_properties(self, tmp_path):
         """Test Migration class properties"""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            up_file = Path(temp_dir) / "000001_test.up.sql"
-            down_file = Path(temp_dir) / "000001_test.down.sql"
-            up_file.write_text("CREATE TABLE test;")
-            down_file.write_text("DROP TABLE test;")
-
-            migration = Migration(
-                version=1, name="test", up_file=up_file, down_file=down_file
-            )
+        up_file = tmp_path / "000001_test.up.sql"
+        down_file = tmp_path / "000001_test.down.sql"
+        up_file.write_text("CREATE TABLE test;")
+        down_file.write_text("DROP TABLE test;")
+
+        migration = Migration(
+            version=1, name="test", up_file=up_file, down_file=down_file
+        )
 
-            self.assertEqual(migration.filename_prefix, "000001_test")
-            self.assertTrue(migration.has_up_file())
-            self.assertTrue(migration.has_down_file())
+        assert migration.filename_prefix == "000001_test"
+        assert migration.has_up_file()
+        assert migration.has_down_file()
 
     def test_migration_missing_files(self):
         """Test migration with missing files"""
@@ -648,8 +957,20 @@ class MigrateWrapperTestMixin:
             down_file=None,
         )
 
-        self.assertFalse(migration.has_up_file())
-        self.assertFalse(migration.has_down_file())
+        assert not migration.has_up_file()
+        assert not migration.has_down_file()
+
+    def test_migration_recheck_disk(self, wrapper, create_test_migration):
+        """Test scanned migrations reuse scan results until rechecked"""
+        create_test_migration(1, "first", "CREATE TABLE a;", "DROP TABLE a;")
+        migration = wrapper.list_migrations()[0]
+
+        migration.down_file.unlink()
+        assert migration.has_down_file()
+
+        migration.recheck_disk()
+        assert migration.has_up_file()
+        assert not migration.has_down_file()
 
     def test_migration_timestamp_prefix(self):
         """Test migration with timestamp"""
@@ -661,20 +982,19 @@ class MigrateWrapperTestMixin:
             timestamp=20231225120000,
         )
 
-        self.assertEqual(migration.filename_prefix, "20231225120000_test")
+        assert migration.filename_prefix == "20231225120000_test"
 
     # Integration scenarios
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_full_migration_lifecycle(self, mock_run):
+    def test_full_migration_lifecycle(self, mock_run, wrapper, create_test_migration):
         """Test complete migration lifecycle"""
         # Create migrations
-        self.create_test_migration(
+        create_test_migration(
             1,
             "create_users",
             "CREATE TABLE users (id INTEGER PRIMARY KEY);",
             "DROP TABLE users;",
         )
-        self.create_test_migration(
+        create_test_migration(
             2,
             "add_email",
             "ALTER TABLE users ADD COLUMN email TEXT;",
@@ -682,53 +1002,52 @@ class MigrateWrapperTestMixin:
         )
 
         # Mock successful operations
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
+        mock_run.return_value = _OK
 
         # Apply migrations
-        result = self.wrapper.up()
-        self.assertTrue(result.success)
+        result = wrapper.up()
+        assert result.success
 
         # Rollback one
-        result = self.wrapper.down(steps=1)
-        self.assertTrue(result.success)
+        result = wrapper.down(steps=1)
+        assert result.success
 
         # Go to specific version
-        result = self.wrapper.goto(version=2)
-        self.assertTrue(result.success)
+        result = wrapper.goto(version=2)
+        assert result.success
 
         # Drop database
-        result = self.wrapper.drop(force=True)
-        self.assertTrue(result.success)
+        result = wrapper.drop(force=True)
+        assert result.success
 
-    @patch("migrate_wrapper.command.subprocess.run")
-    def test_dirty_state_recovery(self, mock_run):
+    def test_dirty_state_recovery(self, mock_run, wrapper):
         """Test recovering from dirty state"""
         # Simulate dirty state
-        mock_run.side_effect = [
+        mock_run.side_effect = _results(
             # First up fails and leaves dirty
-            MagicMock(returncode=1, stdout="", stderr="migration failed"),
+            (1, b"", b"migration failed"),
             # up() calls version() after failure
-            MagicMock(returncode=0, stdout="version: 2\n", stderr=""),
+            (0, b"version: 2\n", b""),
             # status() call shows dirty
-            MagicMock(returncode=0, stdout="version: 2 (dirty)\n", stderr=""),
+            (0, b"version: 2 (dirty)\n", b""),
             # Force to fix
-            MagicMock(returncode=0, stdout="", stderr=""),
+            (0, b"", b""),
             # Verify clean
-            MagicMock(returncode=0, stdout="version: 2\n", stderr=""),
-        ]
+            (0, b"version: 2\n", b""),
+        )
 
         # Try to migrate (fails with non-dirty error for this test)
-        result = self.wrapper.up()
-        self.assertFalse(result.success)
+        result = wrapper.up()
+        assert not result.success
 
         # Check status
-        status = self.wrapper.status()
-        self.assertTrue(status.dirty)
+        status = wrapper.status()
+        assert status.dirty
 
         # Fix with force
-        result = self.wrapper.force(version=status.version)
-        self.assertTrue(result.success)
+        result = wrapper.force(version=status.version)
+        assert result.success
 
         # Verify clean
-        status = self.wrapper.status()
-        self.assertFalse(status.dirty)
+        status = wrapper.status()
+        assert not status.dirty
@@ -3,75 +3,108 @@ Tests for MigrateWrapper using SQLite database
 """
 
 import sqlite3
-from pathlib import Path
+
+import pytest
 
 from tests.test_base import MigrateWrapperTestBase, MigrateWrapperTestMixin
 
 
+def _fast_sqlite_connect(path) -> sqlite3.Connection:
+    """Open a connection that skips durability work the tests don't need"""
+    conn = sqlite3.connect(str(path))
+    # Test data need not survive a crash, so avoid fsync and journal files.
+    # Locking stays normal, as migrate opens the same file while this is open
+    conn.executescript(
+        """
+        PRAGMA synchronous = OFF;
+        PRAGMA journal_mode = MEMORY;
+        PRAGMA temp_store = MEMORY;
+    """
+    )
+    return conn
+
+
+def _create_schema_migrations(conn: sqlite3.Connection) -> None:
+    """Create the schema_migrations table if it doesn't exist"""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            dirty INTEGER NOT NULL DEFAULT 0
+        )
+    """
+    )
+
+
+def _set_version(conn: sqlite3.Connection, version: int, dirty: bool) -> None:
+    """Replace the recorded version on an open connection"""
+    conn.execute("DELETE FROM schema_migrations")
+    conn.execute(
+        "INSERT INTO schema_migrations (version, dirty) VALUES (?, ?)",
+        (version, 1 if dirty else 0),
+    )
+
+
 class TestMigrateWrapperSQLite(MigrateWrapperTestBase, MigrateWrapperTestMixin):
     """Test suite for MigrateWrapper with SQLite"""
 
-    def setup_database(self) -> str:
-        """Setup SQLite database and return connection URL"""
-        # Use file-based database with unique name for parallel testing
+    @pytest.fixture(scope="class")
+    @classmethod
+    def db_url(cls, tmp_path_factory) -> str:
+        """Setup SQLite database once per class and return connection URL"""
+        # Use file-based database shared by the tests in the class
         # SQLite's in-memory mode has issues with migrate tool
-        import uuid
-
-        db_name = f"test_{uuid.uuid4().hex[:8]}.db"
-        self.db_path = Path(self.temp_dir) / db_name
-        # Use temp file which is fast enough for testing
-        return f"sqlite://{self.db_path}"
-
-    def cleanup_database(self):
-        """Cleanup SQLite database"""
+        cls.db_path = tmp_path_factory.mktemp("db") / "test.db"
         # File will be cleaned up with temp directory
-        pass
+        return f"sqlite://{cls.db_path}"
 
-    def create_schema_migrations_table(self):
-        """Create schema_migrations table manually for testing"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS schema_migrations (
-                version INTEGER PRIMARY KEY,
-                dirty INTEGER NOT NULL DEFAULT 0
-            )
-        """
-        )
-        conn.commit()
+    @pytest.fixture
+    def sqlite_connection(self, db_url):
+        """Connection to the class database shared by the test's helpers"""
+        conn = _fast_sqlite_connect(self.db_path)
+        yield conn
         conn.close()
 
-    def set_db_version(self, version: int, dirty: bool = False):
-        """Set database version manually for testing"""
-        self.create_schema_migrations_table()
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM schema_migrations")
-        cursor.execute(
-            "INSERT INTO schema_migrations (version, dirty) VALUES (?, ?)",
-            (version, 1 if dirty else 0),
-        )
-        conn.commit()
-        conn.close()
+    @pytest.fixture
+    def create_schema_migrations_table(self, sqlite_connection):
+        """Callable creating schema_migrations table manually for testing"""
+
+        def create():
+            with sqlite_connection as conn:
+                _create_schema_migrations(conn)
+
+        return create
+
+    @pytest.fixture
+    def set_db_version(self, sqlite_connection):
+        """Callable setting database version manually for testing"""
+
+        def set_version(version: int, dirty: bool = False):
+            # Create the table and set the version in a single transaction
+            with sqlite_connection as conn:
+                _create_schema_migrations(conn)
+                _set_version(conn, version, dirty)
+
+        return set_version
 
 
 # SQLite-specific tests
 class TestSQLiteSpecificFeatures(TestMigrateWrapperSQLite):
     """Tests specific to SQLite features"""
 
-    def test_sqlite_connection_string_format(self):
+    def test_sqlite_connection_string_format(self, db_url):
         """Test SQLite connection string format"""
-        self.assertTrue(self.db_url.startswith("sqlite://"))
-        self.assertIn(str(self.db_path), self.db_url)
+        assert db_url.startswith("sqlite://")
+        assert str(self.db_path) in db_url
 
-    def test_sqlite_schema_migrations_table(self):
+    def test_sqlite_schema_migrations_table(
+        self, sqlite_connection, create_schema_migrations_table
+    ):
         """Test SQLite schema_migrations table creation"""
-        self.create_schema_migrations_table()
+        create_schema_migrations_table()
 
         # Verify table exists
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        cursor = sqlite_connection.cursor()
         cursor.execute(
             """
             SELECT name FROM sqlite_master
@@ -79,30 +112,29 @@ class TestSQLiteSpecificFeatures(TestMigrateWrapperSQLite):
         """
         )
         result = cursor.fetchone()
-        conn.close()
 
-        self.assertIsNotNone(result)
-        self.assertEqual(result[0], "schema_migrations")
+        assert result is not None
+        assert result[0] == "schema_migrations"
 
-    def test_sqlite_integer_primary_key(self):
+    def test_sqlite_integer_primary_key(self, wrapper, create_test_migration):
         """Test SQLite INTEGER PRIMARY KEY in migrations"""
-        self.create_test_migration(
+        create_test_migration(
             1,
             "create_users",
             "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT);",
             "DROP TABLE users;",
         )
 
-        migrations = self.wrapper.list_migrations()
-        self.assertEqual(len(migrations), 1)
+        migrations = wrapper.list_migrations()
+        assert len(migrations) == 1
 
         # Check file contents
         up_content = migrations[0].up_file.read_text()
-        self.assertIn("INTEGER PRIMARY KEY", up_content)
+        assert "INTEGER PRIMARY KEY" in up_content
 
-    def test_sqlite_without_rowid(self):
+    def test_sqlite_without_rowid(self, wrapper, create_test_migration):
         """Test SQLite WITHOUT ROWID table option"""
-        self.create_test_migration(
+        create_test_migration(
             1,
             "create_optimized_table",
             """
@@ -115,16 +147,16 @@ class TestSQLiteSpecificFeatures(TestMigrateWrapperSQLite):
             "DROP TABLE cache;",
         )
 
-        migrations = self.wrapper.list_migrations()
-        self.assertEqual(len(migrations), 1)
+        migrations = wrapper.list_migrations()
+        assert len(migrations) == 1
 
         # Check file contents
         up_content = migrations[0].up_file.read_text()
-        self.assertIn("WITHOUT ROWID", up_content)
+        assert "WITHOUT ROWID" in up_content
 
-    def test_sqlite_pragma_statements(self):
+    def test_sqlite_pragma_statements(self, wrapper, create_test_migration):
         """Test SQLite PRAGMA statements in migrations"""
-        self.create_test_migration(
+        create_test_migration(
             1,
             "enable_foreign_keys",
             """
@@ -141,16 +173,10 @@ class TestSQLiteSpecificFeatures(TestMigrateWrapperSQLite):
             """,
         )
 
-        migrations = self.wrapper.list_migrations()
-        self.assertEqual(len(migrations), 1)
+        migrations = wrapper.list_migrations()
+        assert len(migrations) == 1
 
         # Check file contents
         up_content = migrations[0].up_file.read_text()
-        self.assertIn("PRAGMA foreign_keys", up_content)
-        self.assertIn("REFERENCES", up_content)
-
-
-if __name__ == "__main__":
-    import unittest
-
-    unittest.main()
+        assert "PRAGMA foreign_keys" in up_content
+        assert "REFERENCES" in up_content